@@ -0,0 +1,226 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+CACHE_VERSION = 1
+
+# staging directories untouched for this long belong to a process that died mid-run
+STALE_STAGING_SECONDS = 60 * 60
+
+class BatchCache:
+    def __init__(self, root, max_bytes=10 * 2**30):
+        """
+            root :: str :
+                the directory that cached batches are stored in
+            max_bytes :: int :
+                the total size (in bytes) the cache may grow to before the least recently
+                used entries are evicted
+
+            Each entry is a directory named after the hash of a generation config, holding one
+            pair of raw `.npy` files per batch. Hits are served memory mapped, so reading a
+            batch only pages in what is actually touched.
+        """
+
+        self.root = root
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock_path = os.path.join(self.root, '.lock')
+
+    def key(self, config):
+        """
+            config :: dict :
+                the full generation config, including the seed
+
+            Returns the hex digest that identifies `config` in this cache.
+        """
+        blob = json.dumps({'version': CACHE_VERSION, **config}, sort_keys=True)
+
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+            Returns True if there is an entry for `key`.
+
+            Batches are read one at a time with `load`, so only one entry's files are ever
+            mapped at once.
+        """
+        path = self._entry_path(key)
+
+        with self._lock(fcntl.LOCK_SH):
+            if not os.path.isdir(path):
+                return False
+
+            # bump the access time so this entry is the most recently used
+            os.utime(path)
+
+            return True
+
+    def load(self, key, batch):
+        """
+            Returns the memory mapped `(batch_x, batch_y)` pair for `batch` of `key`.
+
+            The arrays are mapped copy-on-write, so callers may edit them in place without
+            touching the cached files.
+
+            Raises FileNotFoundError if the entry was evicted since `get`.
+        """
+        path = self._entry_path(key)
+
+        with self._lock(fcntl.LOCK_SH):
+            os.utime(path)
+
+            return (
+                np.load(os.path.join(path, 'x_%d.npy' % batch), mmap_mode='c'),
+                np.load(os.path.join(path, 'y_%d.npy' % batch), mmap_mode='c')
+            )
+
+    def writer(self, key):
+        """
+            Returns a `_CacheWriter` that stages batches for `key` and publishes them on `commit`.
+        """
+        return _CacheWriter(self, key)
+
+    def clear(self):
+        with self._lock(fcntl.LOCK_EX):
+            for name in self._entries():
+                self._remove(name)
+
+    def _publish(self, key, staging):
+        path = self._entry_path(key)
+
+        with self._lock(fcntl.LOCK_EX):
+            if os.path.isdir(path):
+                # another process got here first, keep theirs
+                shutil.rmtree(staging, ignore_errors=True)
+            elif os.path.isdir(staging):
+                os.rename(staging, path)
+
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        """
+            Removes least recently used entries until the cache fits within `max_bytes`.
+            Must be called with the exclusive lock held.
+
+            Stale staging directories and leftover trash are deleted, live staging
+            directories count towards the total.
+        """
+        entries = []
+        total = 0
+
+        for name in os.listdir(self.root):
+            path = self._entry_path(name)
+
+            if name.startswith('.trash-'):
+                # a removal that died part way through
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+
+            if not name.startswith('.staging-'):
+                continue
+
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_STAGING_SECONDS:
+                    self._remove(name)
+                else:
+                    total += sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            except FileNotFoundError:
+                # its writer committed or aborted while we were looking
+                pass
+
+        for name in self._entries():
+            path = self._entry_path(name)
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), name, size))
+            total += size
+
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+
+            self._remove(name)
+            total -= size
+
+    def _remove(self, name):
+        """
+            Renames `name` out of the way before deleting it, so a removal that dies part way
+            through never leaves a partial entry behind. Must be called with the exclusive
+            lock held.
+        """
+        trash = tempfile.mkdtemp(prefix='.trash-', dir=self.root)
+
+        os.rename(self._entry_path(name), os.path.join(trash, name))
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def _entries(self):
+        return [name for name in os.listdir(self.root) if not name.startswith('.')]
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def _lock(self, mode):
+        return _FileLock(self._lock_path, mode)
+
+class _CacheWriter:
+    def __init__(self, cache, key):
+        """
+            Stages the batches of one run. If the staging directory is reclaimed as stale
+            before the run finishes, the writer quietly stops and nothing is cached.
+        """
+        self.cache = cache
+        self.key = key
+        self.num_batches = 0
+        self.dropped = False
+
+        # stage inside the cache root so that publishing is a single atomic rename
+        self.staging = tempfile.mkdtemp(prefix='.staging-', dir=cache.root)
+        # mkdtemp makes it 0700, published entries must be readable by other users' processes
+        os.chmod(self.staging, 0o755)
+
+    def add(self, batch_x, batch_y):
+        if self.dropped:
+            return
+
+        try:
+            # mark this run as live for `_evict`
+            os.utime(self.staging)
+
+            np.save(os.path.join(self.staging, 'x_%d.npy' % self.num_batches), batch_x)
+            np.save(os.path.join(self.staging, 'y_%d.npy' % self.num_batches), batch_y)
+        except FileNotFoundError:
+            self.dropped = True
+            return
+
+        self.num_batches += 1
+
+    def commit(self):
+        if not self.dropped:
+            self.cache._publish(self.key, self.staging)
+
+    def abort(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+class _FileLock:
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+
+    def __enter__(self):
+        # read only, so processes of other users can lock it too
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, self.mode)
+
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import random
+import numpy as np
+from render import build_world, render_video
+
+class SimulationDataset:
+    def __init__(self, length, num_frames, output_size, world=(800,800), view=(400,400), num_agents=400, all_noisy=False, seed=0):
+        """
+            length :: int :
+                the number of videos in this dataset
+            num_frames :: int :
+                the number of frames in each video
+            output_size :: tuple of int :
+                the height,width of each motion map
+            seed :: int :
+                the base seed, every video's seed is derived from this, the config, and its index
+
+            `ds[i]` returns the `(x, y)` pair for video `i`, rendered on demand. The same index
+            always yields the same video, regardless of `length` or of which process asks for
+            it, so workers can split indices between them (e.g. `ds[worker::num_workers]`)
+            without any coordination.
+        """
+
+        self.config = {
+            'num_frames': num_frames,
+            'output_size': list(output_size),
+            'world': list(world),
+            'view': list(view),
+            'num_agents': num_agents,
+            'all_noisy': all_noisy,
+            'seed': seed,
+        }
+
+        self._indices = range(length)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            ds = SimulationDataset.__new__(SimulationDataset)
+            ds.config = self.config
+            ds._indices = self._indices[i]
+            return ds
+
+        return self.render(self._indices[i])
+
+    def __iter__(self):
+        for index in self._indices:
+            yield self.render(index)
+
+    def seed_for(self, index):
+        """
+            Returns the 128 bit seed used to render the video at absolute `index`.
+        """
+        blob = json.dumps({'index': index, **self.config}, sort_keys=True)
+
+        return int.from_bytes(hashlib.sha256(blob.encode('utf-8')).digest()[:16], 'little')
+
+    def render(self, index):
+        """
+            Builds and renders the video at absolute `index`.
+
+            The world and its agents draw from the global `random` and `np.random` generators,
+            so they are reseeded for this video and put back the way they were afterwards.
+        """
+        seed = self.seed_for(index)
+
+        random_state = random.getstate()
+        np_state = np.random.get_state()
+
+        try:
+            seed_globals(seed)
+
+            c = self.config
+            w = build_world(c['world'], c['view'], c['num_agents'], c['all_noisy'])
+
+            return render_video(w, c['num_frames'], c['output_size'])
+        finally:
+            random.setstate(random_state)
+            np.random.set_state(np_state)
+
+def seed_globals(seed):
+    """
+        Seeds the global `random` and `np.random` generators with the arbitrarily large int `seed`.
+    """
+    random.seed(seed)
+    # the legacy seeder only takes 32 bit ints, but accepts an array of them
+    np.random.seed([(seed >> (32 * word)) & 0xffffffff for word in range(4)])
@@ -1,41 +1,99 @@
-import random
-from world import World
+from collections import deque
+from multiprocessing import Pool
 import numpy as np
+from dataset import SimulationDataset
+from render import build_world, render_video
 
 class SimulationGenerator:
-    def __init__(self):
-        pass
+    def __init__(self, cache=None):
+        """
+            cache :: BatchCache or None :
+                if given, seeded calls to `generate` are served from and stored into this cache
+        """
+        self.cache = cache
 
-    def generate(self, num_batches, num_frames, output_size, vids_in_batch=5, world=(800,800), view=(400,400), num_agents=400, all_noisy=False):
+    def generate(self, num_batches, num_frames, output_size, vids_in_batch=5, world=(800,800), view=(400,400), num_agents=400, all_noisy=False, seed=None, workers=1):
+        """
+            seed :: int or None :
+                ::int : every video gets a seed derived from this, so the output is reproducible
+                ::None : use whatever state the global generators are already in
+            workers :: int :
+                the number of processes to render videos in, more than one requires a seed
+                and produces exactly the same output as a single process
+        """
+        if workers > 1 and seed is None:
+            raise RuntimeError('Expected a seed when rendering with more than one worker')
+
+        if seed is None or self.cache is None:
+            yield from self._generate(num_batches, num_frames, output_size, vids_in_batch, world, view, num_agents, all_noisy, seed, workers)
+            return
+
+        key = self.cache.key({
+            'num_batches': num_batches,
+            'num_frames': num_frames,
+            'output_size': list(output_size),
+            'vids_in_batch': vids_in_batch,
+            'world': list(world),
+            'view': list(view),
+            'num_agents': num_agents,
+            'all_noisy': all_noisy,
+            'seed': seed,
+        })
+
+        if self.cache.get(key):
+            for batch in range(num_batches):
+                try:
+                    batch_x, batch_y = self.cache.load(key, batch)
+                except FileNotFoundError:
+                    # evicted by another process part way through, or left incomplete by a
+                    # removal that died, render the rest instead
+                    yield from self._generate(num_batches, num_frames, output_size, vids_in_batch, world, view, num_agents, all_noisy, seed, workers, start=batch)
+                    return
+
+                yield batch_x, batch_y
+            return
+
+        writer = self.cache.writer(key)
+
+        try:
+            for batch_x, batch_y in self._generate(num_batches, num_frames, output_size, vids_in_batch, world, view, num_agents, all_noisy, seed, workers):
+                writer.add(batch_x, batch_y)
+
+                yield batch_x, batch_y
+        except BaseException:
+            # includes GeneratorExit, a partially consumed run is never cached
+            writer.abort()
+            raise
+
+        writer.commit()
+
+    def _generate(self, num_batches, num_frames, output_size, vids_in_batch, world, view, num_agents, all_noisy, seed, workers=1, start=0):
+        """
+            start :: int :
+                the first batch to yield, only supported for seeded runs
+        """
+        if seed is None:
+            videos = (render_video(build_world(world, view, num_agents, all_noisy), num_frames, output_size) for _ in range(num_batches * vids_in_batch))
+
+            yield from self._batch(videos, num_batches, vids_in_batch)
+            return
+
+        # seeded runs render video i of the run exactly like `SimulationDataset(...)[i]`
+        ds = SimulationDataset(num_batches * vids_in_batch, num_frames, output_size, world=world, view=view, num_agents=num_agents, all_noisy=all_noisy, seed=seed)[start * vids_in_batch:]
+
+        if workers <= 1:
+            yield from self._batch(iter(ds), num_batches - start, vids_in_batch)
+            return
+
+        with Pool(workers) as pool:
+            yield from self._batch(render_in_pool(pool, ds, 4 * workers), num_batches - start, vids_in_batch)
+
+    def _batch(self, videos, num_batches, vids_in_batch):
         for batch in range(num_batches):
             batch_x = []
             batch_y = []
             for vid in range(vids_in_batch):
-                # set up world
-                if all_noisy:
-                    w = World(*world, agents=num_agents, color='noise', noisy=True, view_size=view)
-                else:
-                    p = random.choice([0, 1, 2, 3])
-                    if p == 0:
-                        w = World(*world, agents=num_agents, noisy=True, view_size=view)
-                    elif p == 1:
-                        w = World(*world, agents=num_agents, color='noise', view_size=view)
-                    elif p == 2:
-                        w = World(*world, agents=num_agents, view_size=view)
-                    elif p == 3:
-                        w = World(*world, agents=num_agents, color='noise', noisy=True, view_size=view)
-
-                x = []
-                y = []
-
-                for frame in range(num_frames):
-                    x.append(w.draw())
-                    y.append(w.draw_motion_map(*output_size))
-
-                    w.update()
-
-                x = np.array(x)
-                y = np.array(y)
+                x, y = next(videos)
 
                 batch_x.append(x)
                 batch_y.append(y)
@@ -44,4 +102,27 @@ class SimulationGenerator:
             batch_y = np.array(batch_y)
 
             yield batch_x, batch_y
-            
\ No newline at end of file
+
+def render_in_pool(pool, ds, depth):
+    """
+        Yields `ds[0], ds[1], ...` rendered by `pool`, in index order.
+
+        At most `depth` videos are queued or waiting to be consumed at once, so a slow
+        consumer holds the workers back instead of the whole run piling up in memory.
+    """
+    pending = deque()
+    indices = iter(range(len(ds)))
+
+    for i in indices:
+        pending.append(pool.apply_async(ds.__getitem__, (i,)))
+        if len(pending) >= depth:
+            break
+
+    while pending:
+        video = pending.popleft().get()
+
+        i = next(indices, None)
+        if i is not None:
+            pending.append(pool.apply_async(ds.__getitem__, (i,)))
+
+        yield video
@@ -0,0 +1,26 @@
+import cv2
+import numpy as np
+
+def preview(w):
+    """
+        Shows frames, motion masks and motion maps for `w` side by side, stepping the world
+        on each key press.
+    """
+    height = w.view.bry - w.view.tly
+    width = w.view.brx - w.view.tlx
+
+    img = np.zeros((height, 3 * width + 2, 3), np.uint8)
+
+    img[:, width, 0] = 128
+
+    while True:
+        img[:, :width, :] = w.draw()
+        img[:, width+1:2*width+1, :] = w.draw_motion_mask()
+
+        mp = w.draw_motion_map(16, 16)
+        mp = 255 * np.repeat(mp[:, :, np.newaxis], 3, axis=2)
+        img[:, 2*width+2:, :] = cv2.resize(mp, (width,height))
+
+        cv2.imshow('world', img)
+        cv2.waitKey(0)
+        w.update()
@@ -0,0 +1,32 @@
+import random
+from world import World
+import numpy as np
+
+def build_world(world, view, num_agents, all_noisy):
+    if all_noisy:
+        return World(*world, agents=num_agents, color='noise', noisy=True, view_size=view)
+
+    p = random.choice([0, 1, 2, 3])
+    if p == 0:
+        return World(*world, agents=num_agents, noisy=True, view_size=view)
+    elif p == 1:
+        return World(*world, agents=num_agents, color='noise', view_size=view)
+    elif p == 2:
+        return World(*world, agents=num_agents, view_size=view)
+    elif p == 3:
+        return World(*world, agents=num_agents, color='noise', noisy=True, view_size=view)
+
+def render_video(w, num_frames, output_size):
+    """
+        Steps `w` for `num_frames` frames and returns the `(x, y)` pair of frames and motion maps.
+    """
+    x = []
+    y = []
+
+    for frame in range(num_frames):
+        x.append(w.draw())
+        y.append(w.draw_motion_map(*output_size))
+
+        w.update()
+
+    return np.array(x), np.array(y)
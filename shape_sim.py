@@ -0,0 +1,229 @@
+"""
+    Headless entry point, run as `python -m shape_sim <command> --config <file.json>`.
+
+    generate :: render batches with `SimulationGenerator` and stream them to a sink
+    bench    :: render batches and throw them away, only reporting throughput
+    preview  :: open the GUI preview window for one world built from the config
+
+    The config file is a JSON object whose keys match the arguments of
+    `SimulationGenerator.generate`, plus the optional `cache_dir` and `cache_bytes`.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import numpy as np
+
+from dataset import SimulationDataset, seed_globals
+from generator import SimulationGenerator
+from render import build_world
+
+DEFAULTS = {
+    'num_batches': 10,
+    'num_frames': 20,
+    'output_size': [28, 28],
+    'vids_in_batch': 5,
+    'world': [800, 800],
+    'view': [400, 400],
+    'num_agents': 400,
+    'all_noisy': False,
+    'seed': None,
+    'cache_dir': None,
+    'cache_bytes': 10 * 2**30,
+}
+
+def load_config(path):
+    config = dict(DEFAULTS)
+
+    if path is not None:
+        with open(path) as f:
+            config.update(json.load(f))
+
+    unknown = set(config) - set(DEFAULTS)
+    if unknown:
+        raise RuntimeError('Unknown config keys: %s' % ', '.join(sorted(unknown)))
+
+    return config
+
+class NpySink:
+    def __init__(self, directory):
+        """
+            Writes each batch to `directory` as a `x_<n>.npy`, `y_<n>.npy` pair.
+        """
+        self.directory = directory
+        self.num_batches = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write(self, batch_x, batch_y):
+        np.save(os.path.join(self.directory, 'x_%d.npy' % self.num_batches), batch_x)
+        np.save(os.path.join(self.directory, 'y_%d.npy' % self.num_batches), batch_y)
+
+        self.num_batches += 1
+
+class NullSink:
+    def write(self, batch_x, batch_y):
+        pass
+
+class Progress:
+    def __init__(self, total_frames, stream=sys.stderr):
+        self.total_frames = total_frames
+        self.stream = stream
+        self.frames = 0
+        self.start = time.time()
+
+    def update(self, frames):
+        self.frames += frames
+
+        elapsed = time.time() - self.start
+        fps = self.frames / elapsed if elapsed > 0 else 0.0
+        eta = (self.total_frames - self.frames) / fps if fps > 0 else float('inf')
+
+        self.stream.write('\r%d/%d frames  %.1f frames/s  ETA %s  mem %s   ' % (
+            self.frames, self.total_frames, fps, _format_seconds(eta), _format_bytes(_memory_use())
+        ))
+        self.stream.flush()
+
+    def finish(self):
+        self.stream.write('\n')
+        self.stream.flush()
+
+        return self.frames, time.time() - self.start
+
+def _memory_use():
+    """
+        Returns the current resident set size of this process plus its worker processes,
+        in bytes, or None if it can't be measured.
+    """
+    if not os.path.isdir('/proc'):
+        try:
+            import resource
+        except ImportError:
+            # windows
+            return None
+
+        # ru_maxrss is this process's peak rather than a current value, in bytes on macOS
+        # and kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    return sum(_rss('/proc/%d/statm' % pid) for pid in [os.getpid()] + [p.pid for p in multiprocessing.active_children()])
+
+def _rss(statm):
+    try:
+        with open(statm) as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except FileNotFoundError:
+        # the worker exited between listing and reading
+        return 0
+
+def _format_seconds(seconds):
+    if seconds == float('inf'):
+        return '--:--'
+
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return '%d:%02d:%02d' % (hours, minutes, seconds)
+
+def _format_bytes(n):
+    if n is None:
+        return 'n/a'
+
+    for unit in ['B', 'KiB', 'MiB', 'GiB']:
+        if n < 1024:
+            return '%.1f%s' % (n, unit)
+        n /= 1024.0
+
+    return '%.1fTiB' % n
+
+def run(config, sink, workers=1):
+    """
+        Generates every batch described by `config` into `sink`, printing live progress.
+
+        Returns the number of frames rendered and the seconds it took.
+    """
+    chosen_seed = False
+    if workers > 1 and config['seed'] is None:
+        config['seed'] = random.randrange(2**32)
+        chosen_seed = True
+        sys.stderr.write('using seed %d\n' % config['seed'])
+
+    cache = None
+    # a run under a seed nobody asked for will never be requested again, don't cache it
+    if config['cache_dir'] is not None and not chosen_seed:
+        # imported here, the cache needs fcntl and nothing else in this module does
+        from cache import BatchCache
+
+        cache = BatchCache(config['cache_dir'], max_bytes=config['cache_bytes'])
+
+    g = SimulationGenerator(cache=cache).generate(
+        config['num_batches'],
+        config['num_frames'],
+        tuple(config['output_size']),
+        vids_in_batch=config['vids_in_batch'],
+        world=tuple(config['world']),
+        view=tuple(config['view']),
+        num_agents=config['num_agents'],
+        all_noisy=config['all_noisy'],
+        seed=config['seed'],
+        workers=workers,
+    )
+
+    progress = Progress(config['num_batches'] * config['vids_in_batch'] * config['num_frames'])
+
+    for batch_x, batch_y in g:
+        sink.write(batch_x, batch_y)
+        progress.update(batch_x.shape[0] * batch_x.shape[1])
+
+    return progress.finish()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m shape_sim')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    generate = commands.add_parser('generate', help='render batches into an output directory')
+    bench = commands.add_parser('bench', help='render batches and report throughput only')
+    show = commands.add_parser('preview', help='open the GUI preview for one world')
+
+    for p in (generate, bench, show):
+        p.add_argument('--config', help='JSON file of generator settings')
+    for p in (generate, bench):
+        p.add_argument('--workers', type=int, default=1, help='number of rendering processes')
+
+    generate.add_argument('--output', required=True, help="directory to write batches to, or '-' to discard them")
+
+    args = parser.parse_args(argv)
+    config = load_config(args.config)
+
+    if args.command == 'preview':
+        if config['seed'] is not None:
+            # show video 0 of the run this config generates, the globals are left seeded so
+            # stepping the world follows that video too
+            ds = SimulationDataset(1, config['num_frames'], config['output_size'], world=config['world'], view=config['view'], num_agents=config['num_agents'], all_noisy=config['all_noisy'], seed=config['seed'])
+            seed_globals(ds.seed_for(0))
+
+        from preview import preview
+
+        preview(build_world(config['world'], config['view'], config['num_agents'], config['all_noisy']))
+        return
+
+    if args.command == 'bench':
+        # a cache hit would only measure disk reads
+        config['cache_dir'] = None
+        sink = NullSink()
+    elif args.output == '-':
+        sink = NullSink()
+    else:
+        sink = NpySink(args.output)
+
+    frames, seconds = run(config, sink, workers=args.workers)
+
+    print('%d frames in %.1fs (%.1f frames/s) with %d worker(s)' % (frames, seconds, frames / max(seconds, 1e-9), args.workers))
+
+if __name__ == '__main__':
+    main()
@@ -16,7 +16,7 @@ class CircleAgent(VisualAgent):
         radius = self.radius
         z = np.zeros((2*radius, 2*radius, 3))
         # n = np.random.randint(256, size=(2*radius,2*radius,3), dtype=np.uint8)
-        n = np.random.default_rng().integers(255, size=(2*radius, 2*radius, 3), dtype=np.uint8)
+        n = np.random.default_rng(np.random.randint(2**31)).integers(255, size=(2*radius, 2*radius, 3), dtype=np.uint8)
 
         z = cv2.circle(z, (radius,radius), radius, (1,1,1), -1)
 
@@ -105,7 +105,7 @@ class RectangleAgent(VisualAgent):
             self.noise = self._generate_noise()
 
     def _generate_noise(self):
-        return np.random.default_rng().integers(255, size=(*self.shape, 3), dtype=np.uint8)
+        return np.random.default_rng(np.random.randint(2**31)).integers(255, size=(*self.shape, 3), dtype=np.uint8)
 
     def _handle_shape(self, shape, min_dim=2, max_dim=15):
         if shape is None:
@@ -83,7 +83,7 @@ class World:
 
     def _generate_noise(self):
         # return np.random.randint(256, size=(self.height,self.width,3), dtype=np.uint8)
-        return np.random.default_rng().integers(255, size=(self.height,self.width, 3), dtype=np.uint8)
+        return np.random.default_rng(np.random.randint(2**31)).integers(255, size=(self.height,self.width, 3), dtype=np.uint8)
 
     def _random_color(self):
         return (np.random.randint(256), np.random.randint(256), np.random.randint(256))